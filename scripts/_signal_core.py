@@ -0,0 +1,386 @@
+"""
+Shared KuCoin fetch + rolling-window computations for fetch_and_compute.py
+and fetch_and_log_history.py (and the kline cache / atomic write used by
+fetch_and_compute_v2.py), plus the optional-orjson `loads` shared by the
+history readers. Scripts import it by name; `python scripts/x.py` puts
+scripts/ on sys.path.
+"""
+
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
+from math import fsum
+from operator import gt, itemgetter
+from typing import List
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from zoneinfo import ZoneInfo  # Python 3.9+
+except ImportError:
+    from backports.zoneinfo import ZoneInfo  # type: ignore
+
+try:
+    import orjson  # optional, faster response / snapshot parsing
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+KUCOIN_URL = "https://api.kucoin.com/api/v1/market/candles"
+# Concurrent kline requests; also the session's connection pool size, so
+# every in-flight request keeps its connection for reuse.
+FETCH_WORKERS = 4
+LOCAL_TZ = ZoneInfo("Africa/Johannesburg")
+
+# Shared keep-alive session so back-to-back fetches reuse the TLS connection.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_WORKERS))
+
+# Raw KuCoin bodies, keyed by (symbol, interval), shared by every fetch
+# script in a run. Entries expire after the TTL or at the next hourly candle
+# close, whichever comes first.
+KLINE_CACHE_DIR = os.path.join(".cache", "klines")
+KLINE_CACHE_TTL_SECONDS = 1800
+
+
+def _kline_cache_path(symbol, interval):
+    return os.path.join(KLINE_CACHE_DIR, f"{symbol}_{interval}.json")
+
+
+def load_cached_klines(symbol, interval):
+    path = _kline_cache_path(symbol, interval)
+    try:
+        mtime = os.stat(path).st_mtime
+        now = time.time()
+        if now - mtime > KLINE_CACHE_TTL_SECONDS or now // 3600 != mtime // 3600:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def store_cached_klines(symbol, interval, body):
+    path = _kline_cache_path(symbol, interval)
+    try:
+        os.makedirs(KLINE_CACHE_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+@dataclass
+class Candles:
+    """Candle columns (struct-of-arrays), aligned by index, time ascending."""
+
+    ts: List[int]
+    open: List[float]
+    close: List[float]
+    high: List[float]
+    low: List[float]
+    volume: List[float]
+
+    def __len__(self):
+        return len(self.ts)
+
+
+def fetch_kline_response(symbol: str, interval: str = "1hour"):
+    """
+    Parsed KuCoin candles response for symbol/interval, from the kline cache
+    when fresh. HTTP errors raise; only a response whose "data" is a list is
+    written to the cache.
+    """
+    params = {"symbol": symbol, "type": interval}
+    body = load_cached_klines(symbol, interval)
+    fresh = body is None
+    if fresh:
+        resp = SESSION.get(KUCOIN_URL, params=params, timeout=15)
+        resp.raise_for_status()
+        body = resp.content
+    raw = loads(body)
+    if fresh and isinstance(raw.get("data"), list):
+        store_cached_klines(symbol, interval, body)
+    return raw
+
+
+def fetch_klines(symbol: str, interval: str = "1hour", limit: int = 96):
+    """
+    Fetch OHLCV candles from KuCoin and return the last `limit` candles,
+    sorted by time ascending, as Candles columns. Open times stay integer
+    epochs; build_integrity_meta turns the handful of reported bounds into
+    UTC/LOCAL_TZ datetimes.
+    """
+    raw = fetch_kline_response(symbol, interval)
+
+    data = raw.get("data", [])
+    rows = []
+
+    for entry in data:
+        if len(entry) < 7:
+            continue
+
+        rows.append(
+            (
+                int(entry[0]),
+                float(entry[1]),
+                float(entry[2]),
+                float(entry[3]),
+                float(entry[4]),
+                float(entry[6]),
+            )
+        )
+
+    # KuCoin returns newest first, so a strictly descending response only
+    # needs reversing; anything else falls back to the stable timestamp sort.
+    ts = [row[0] for row in rows]
+    if all(map(gt, ts, islice(ts, 1, None))):
+        rows.reverse()
+    else:
+        rows.sort(key=itemgetter(0))
+    rows = rows[-limit:]
+
+    # Transpose the kept rows into one list per field.
+    columns = [list(col) for col in zip(*rows)] if rows else [[] for _ in range(6)]
+    return Candles(*columns)
+
+
+def fetch_klines_many(symbols, interval: str = "1hour", limit: int = 96):
+    """
+    fetch_klines for each symbol, up to FETCH_WORKERS requests at a time over
+    the shared session. Results come back in `symbols` order.
+    """
+    symbols = list(symbols)
+    if not symbols:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(symbols), FETCH_WORKERS)) as ex:
+        return list(ex.map(lambda sym: fetch_klines(sym, interval=interval, limit=limit), symbols))
+
+
+def _range_high_low(candles, start_idx_inclusive, end_idx_exclusive):
+    # Plain float columns, so max/min run over the slices in C.
+    return (
+        max(candles.high[start_idx_inclusive:end_idx_exclusive]),
+        min(candles.low[start_idx_inclusive:end_idx_exclusive]),
+    )
+
+
+def compute_rolling_windows(candles):
+    """
+    Raw (high, low) of each rolling window, reduced once and shared by the
+    compute_* helpers below. A window is None when there are too few candles.
+    """
+    n = len(candles)
+    return {
+        "last_24": _range_high_low(candles, -24, None) if n >= 24 else None,
+        "prior_24": _range_high_low(candles, -48, -24) if n >= 48 else None,
+        "first_4": _range_high_low(candles, -24, -20) if n >= 24 else None,
+    }
+
+
+def compute_24h_stats(candles, windows=None):
+    if len(candles) < 24:
+        raise ValueError("Not enough candles for 24h stats")
+
+    if windows is None:
+        windows = compute_rolling_windows(candles)
+    high, low = windows["last_24"]
+
+    return {
+        "high": round(high, 6),
+        "low": round(low, 6),
+        "open": round(candles.open[-24], 6),
+        "close": round(candles.close[-1], 6),
+        "gap_pct": round((high - low) / low * 100, 2) if low else 0.0,
+    }
+
+
+def compute_prior_24h_range(candles, windows=None):
+    """
+    Rolling prior 24h window = candles[-48:-24].
+    """
+    if len(candles) < 48:
+        return {"high": None, "low": None}
+
+    if windows is None:
+        windows = compute_rolling_windows(candles)
+    high, low = windows["prior_24"]
+
+    return {"high": round(high, 6), "low": round(low, 6)}
+
+
+def compute_first_4h_of_current_24h(candles, windows=None):
+    """
+    Rolling 'first 4h' of the CURRENT 24h window:
+      current_24h = candles[-24:]
+      first_4h = current_24h[:4]  -> candles[-24:-20]
+    """
+    if len(candles) < 24:
+        return {"high": None, "low": None}
+
+    if windows is None:
+        windows = compute_rolling_windows(candles)
+    high, low = windows["first_4"]
+    return {"high": round(high, 6), "low": round(low, 6)}
+
+
+def compute_wilder_atr_and_trend(candles, period=14, lookback=10):
+    """
+    Wilder ATR (RMA):
+      - TR computed from candle i and prev close (i-1)
+      - ATR_0 = SMA(TR[0:period])
+      - ATR_t = (ATR_{t-1}*(period-1) + TR_t) / period
+    """
+    if len(candles) < period + 1:
+        return None, "flat"
+
+    # One pass over (high, low, prev close): the first `period` TRs seed the
+    # ATR, the rest feed the recurrence directly. Only the last `lookback`
+    # ATR values are kept, which is all the trend needs.
+    pairs = zip(candles.high[1:], candles.low[1:], candles.close)
+    seed = [
+        max(high - low, abs(high - prev_close), abs(low - prev_close))
+        for high, low, prev_close in islice(pairs, period)
+    ]
+
+    if len(seed) < period:
+        return None, "flat"
+
+    atr = fsum(seed) / period
+    recent = deque([atr], maxlen=lookback)
+    keep = period - 1
+
+    for high, low, prev_close in pairs:
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        atr = (atr * keep + tr) / period
+        recent.append(atr)
+
+    latest_atr = atr
+
+    # Trend: compare last vs atr from (lookback-1) steps ago within atr series
+    if len(recent) < lookback:
+        return round(latest_atr, 4), "flat"
+
+    base = recent[0]
+    change_pct = ((latest_atr - base) / base * 100) if base else 0.0
+
+    if change_pct > 5:
+        trend = "rising"
+    elif change_pct < -5:
+        trend = "falling"
+    else:
+        trend = "flat"
+
+    return round(latest_atr, 4), trend
+
+
+def compute_early_breakout_rolling(candles, hours_window=4, windows=None):
+    """
+    Rolling breakout check:
+      - prior_24h = candles[-48:-24]
+      - current_first_4h = candles[-24:-20] (first 4 of current 24h window)
+      - breakout if first 4h breaks prior range
+    """
+    if len(candles) < 48:
+        return False, "Not enough candles for rolling breakout."
+
+    if windows is None:
+        windows = compute_rolling_windows(candles)
+    prev_high, prev_low = windows["prior_24"]
+    first_high, first_low = windows["first_4"]
+    broke_above = first_high > prev_high
+    broke_below = first_low < prev_low
+
+    if broke_above and broke_below:
+        return True, "Broke above and below prior 24h range in first 4h (rolling)."
+    if broke_above:
+        return True, "Broke above prior 24h high in first 4h (rolling)."
+    if broke_below:
+        return True, "Broke below prior 24h low in first 4h (rolling)."
+
+    return False, "No early breakout (rolling)."
+
+
+def compute_intraday_momentum_rolling(candles, atr):
+    """
+    Momentum computed over rolling current 24h window:
+      diff = close(last) - open(first)
+      classified using ATR threshold
+    """
+    if len(candles) < 24:
+        return "sideways"
+
+    open_p = candles.open[-24]
+    close_p = candles.close[-1]
+    diff = close_p - open_p
+
+    if not atr or abs(diff) < 0.3 * atr:
+        return "sideways"
+    return "up" if diff > 0 else "down"
+
+
+def build_integrity_meta(symbol, interval, requested_limit, candles, now_utc):
+    returned_count = len(candles)
+    last_ts = candles.ts[-1] if returned_count else None
+    first_ts = candles.ts[0] if returned_count else None
+    last_utc = datetime.fromtimestamp(last_ts, tz=timezone.utc) if returned_count else None
+    first_utc = datetime.fromtimestamp(first_ts, tz=timezone.utc) if returned_count else None
+    last_local = datetime.fromtimestamp(last_ts, tz=LOCAL_TZ) if returned_count else None
+    first_local = datetime.fromtimestamp(first_ts, tz=LOCAL_TZ) if returned_count else None
+
+    freshness_min = None
+    if last_utc:
+        freshness_min = round((now_utc - last_utc).total_seconds() / 60.0, 2)
+
+    def iso(dt):
+        return dt.isoformat(timespec="seconds") if dt else None
+
+    # Rolling window bounds (if enough candles)
+    def win_bounds(start_idx_inclusive, end_idx_exclusive):
+        # Index straight into the ts column; no window sub-lists are built.
+        start_ts = candles.ts[start_idx_inclusive]
+        end_ts = candles.ts[end_idx_exclusive - 1]
+        return {
+            "start_local": iso(datetime.fromtimestamp(start_ts, tz=LOCAL_TZ)),
+            "end_local": iso(datetime.fromtimestamp(end_ts, tz=LOCAL_TZ)),
+            "start_utc": iso(datetime.fromtimestamp(start_ts, tz=timezone.utc)),
+            "end_utc": iso(datetime.fromtimestamp(end_ts, tz=timezone.utc)),
+        }
+
+    return {
+        "symbol": symbol,
+        "source": "kucoin",
+        "interval": interval,
+        "requested_limit": requested_limit,
+        "returned_count": returned_count,
+        "first_candle_open_time_local": iso(first_local),
+        "last_candle_open_time_local": iso(last_local),
+        "first_candle_open_time_utc": iso(first_utc),
+        "last_candle_open_time_utc": iso(last_utc),
+        "data_freshness_minutes": freshness_min,
+        "windows": {
+            "last_24h": win_bounds(-24, returned_count) if returned_count >= 24 else None,
+            "prior_24h": win_bounds(-48, -24) if returned_count >= 48 else None,
+            "first_4h_current_24h": win_bounds(-24, -20) if returned_count >= 24 else None,
+        },
+    }
+
+
+def write_text_atomic(path, text):
+    """
+    Write `text` to `path` via a sibling temp file and os.replace, so a
+    concurrent reader sees either the old file or the new one, never a torn one.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
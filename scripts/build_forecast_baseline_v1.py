@@ -20,7 +20,17 @@ def fmt_thr(x: float) -> str:
     return str(x).replace(".", "p")
 
 
+# (threshold, t_hit_up column, mdd_before_hit_up column), built once
+THRESHOLD_COLUMNS = [
+    (thr, f"t_hit_up_{fmt_thr(thr)}", f"mdd_before_hit_up_{fmt_thr(thr)}")
+    for thr in THRESHOLDS
+]
+
+
 def to_float(s: str) -> Optional[float]:
+    # Empty cells are common (no hit); skip the exception path for them.
+    if not s:
+        return None
     try:
         return float(s)
     except Exception:
@@ -28,43 +38,66 @@ def to_float(s: str) -> Optional[float]:
 
 
 def to_int(s: str) -> Optional[int]:
+    if not s:
+        return None
+    # Fast path: hit times are written as plain hour counts ("1" .. "96").
+    if s.isdigit():
+        return int(s)
     try:
         return int(float(s))
     except Exception:
         return None
 
 
-def quantile(sorted_vals: List[float], q: float) -> Optional[float]:
+def fmt4(x: Optional[float]) -> str:
+    return "" if x is None else str(round(x, 4))
+
+
+def fmt6(x: Optional[float]) -> str:
+    return "" if x is None else str(round(x, 6))
+
+
+QUARTILES = (0.25, 0.50, 0.75)
+
+
+def quartiles(sorted_vals: List[float]) -> Tuple[Optional[float], Optional[float], Optional[float]]:
     """
-    Simple linear interpolation quantile.
+    Simple linear interpolation p25 / median / p75 in one call.
     Requires sorted list.
     """
-    if not sorted_vals:
-        return None
-    if len(sorted_vals) == 1:
-        return float(sorted_vals[0])
-    pos = (len(sorted_vals) - 1) * q
-    lo = int(pos)
-    hi = min(lo + 1, len(sorted_vals) - 1)
-    frac = pos - lo
-    return sorted_vals[lo] * (1 - frac) + sorted_vals[hi] * frac
-
-
-def summarize_hits(hit_times: List[int]) -> Dict[str, Optional[float]]:
-    hit_times_sorted = sorted(hit_times)
+    n = len(sorted_vals)
+    if not n:
+        return None, None, None
+    if n == 1:
+        v = float(sorted_vals[0])
+        return v, v, v
+
+    last = n - 1
+    out = []
+    for q in QUARTILES:
+        pos = last * q
+        lo = int(pos)
+        hi = min(lo + 1, last)
+        frac = pos - lo
+        out.append(sorted_vals[lo] * (1 - frac) + sorted_vals[hi] * frac)
+    return out[0], out[1], out[2]
+
+
+def summarize_hits(hit_times_sorted: List[int]) -> Dict[str, Optional[float]]:
+    p25, median, p75 = quartiles(hit_times_sorted)
     return {
-        "t_hit_p25": quantile(hit_times_sorted, 0.25),
-        "t_hit_median": quantile(hit_times_sorted, 0.50),
-        "t_hit_p75": quantile(hit_times_sorted, 0.75),
+        "t_hit_p25": p25,
+        "t_hit_median": median,
+        "t_hit_p75": p75,
     }
 
 
-def summarize_mdd(mdds: List[float]) -> Dict[str, Optional[float]]:
-    mdds_sorted = sorted(mdds)
+def summarize_mdd(mdds_sorted: List[float]) -> Dict[str, Optional[float]]:
+    p25, median, p75 = quartiles(mdds_sorted)
     return {
-        "mdd_p25": quantile(mdds_sorted, 0.25),
-        "mdd_median": quantile(mdds_sorted, 0.50),
-        "mdd_p75": quantile(mdds_sorted, 0.75),
+        "mdd_p25": p25,
+        "mdd_median": median,
+        "mdd_p75": p75,
     }
 
 
@@ -77,6 +110,31 @@ def load_labels_rows() -> List[dict]:
         return list(reader)
 
 
+def load_threshold_columns(
+    rows: List[dict],
+) -> Dict[float, Optional[Tuple[List[Optional[int]], List[Optional[float]]]]]:
+    """
+    Parse the t_hit_up_* / mdd_before_hit_up_* columns once per threshold.
+
+    Returns {thr: (t_hit values, mdd values)} aligned by row, or None for a
+    threshold whose column is missing from the labels file.
+    """
+    header = rows[0].keys() if rows else []
+    cols: Dict[float, Optional[Tuple[List[Optional[int]], List[Optional[float]]]]] = {}
+
+    for thr, tcol, mddcol in THRESHOLD_COLUMNS:
+        # rows with missing columns are skipped (should not happen, but defensive)
+        if tcol not in header:
+            cols[thr] = None
+            continue
+
+        t_vals = [to_int(r.get(tcol, "")) for r in rows]
+        mdd_vals = [to_float(r.get(mddcol, "")) for r in rows]
+        cols[thr] = (t_vals, mdd_vals)
+
+    return cols
+
+
 def main():
     rows = load_labels_rows()
     if not rows:
@@ -95,36 +153,44 @@ def main():
         "results": {},
     }
 
-    for thr in THRESHOLDS:
-        thr_key = fmt_thr(thr)
-        tcol = f"t_hit_up_{thr_key}"
-        mddcol = f"mdd_before_hit_up_{thr_key}"
+    cols = load_threshold_columns(rows)
 
+    for thr in THRESHOLDS:
         out_json["results"][str(thr)] = {}
+        thr_cols = cols[thr]
+
+        # Bucket hits by hit hour in one pass per threshold. HORIZONS is
+        # ascending, so each horizon's hits extend the previous horizon's:
+        # hit_times stays sorted by construction, and each horizon's new
+        # mdds are appended as one run and re-sorted (timsort merges the
+        # sorted prefix with the new run in near-linear time).
+        by_hour: Dict[int, List[Optional[float]]] = {}
+        n_total = 0
+        if thr_cols is not None:
+            t_vals, mdd_vals = thr_cols
+            n_total = len(t_vals)
+            for t, mdd in zip(t_vals, mdd_vals):
+                if t is not None:
+                    by_hour.setdefault(t, []).append(mdd)
+        hours = sorted(by_hour)
+
+        hit_times: List[int] = []
+        hit_mdds: List[float] = []
+        i = 0
 
         for h in HORIZONS:
-            n_total = 0
-            n_hit = 0
-            hit_times: List[int] = []
-            hit_mdds: List[float] = []
-
-            for r in rows:
-                # rows with missing columns are skipped (should not happen, but defensive)
-                if tcol not in r:
-                    continue
-
-                n_total += 1
-
-                t = to_int(r.get(tcol, ""))
-                if t is not None and t <= h:
-                    n_hit += 1
-                    hit_times.append(t)
-
-                    mdd = to_float(r.get(mddcol, ""))
-                    if mdd is not None:
-                        # should already be <= 0, but clamp defensively
-                        hit_mdds.append(min(0.0, mdd))
-
+            n_mdds = len(hit_mdds)
+            while i < len(hours) and hours[i] <= h:
+                t = hours[i]
+                bucket = by_hour[t]
+                hit_times += [t] * len(bucket)
+                # should already be <= 0, but clamp defensively
+                hit_mdds += [min(0.0, mdd) for mdd in bucket if mdd is not None]
+                i += 1
+            if len(hit_mdds) > n_mdds:
+                hit_mdds.sort()
+
+            n_hit = len(hit_times)
             p_hit = (n_hit / n_total) if n_total else 0.0
 
             t_stats = summarize_hits(hit_times) if hit_times else {
@@ -143,13 +209,13 @@ def main():
                 "horizon_h": str(h),
                 "n_total": str(n_total),
                 "n_hit": str(n_hit),
-                "p_hit": str(round(p_hit, 6)),
-                "t_hit_p25": "" if t_stats["t_hit_p25"] is None else str(round(t_stats["t_hit_p25"], 4)),
-                "t_hit_median": "" if t_stats["t_hit_median"] is None else str(round(t_stats["t_hit_median"], 4)),
-                "t_hit_p75": "" if t_stats["t_hit_p75"] is None else str(round(t_stats["t_hit_p75"], 4)),
-                "mdd_p25": "" if mdd_stats["mdd_p25"] is None else str(round(mdd_stats["mdd_p25"], 6)),
-                "mdd_median": "" if mdd_stats["mdd_median"] is None else str(round(mdd_stats["mdd_median"], 6)),
-                "mdd_p75": "" if mdd_stats["mdd_p75"] is None else str(round(mdd_stats["mdd_p75"], 6)),
+                "p_hit": fmt6(p_hit),
+                "t_hit_p25": fmt4(t_stats["t_hit_p25"]),
+                "t_hit_median": fmt4(t_stats["t_hit_median"]),
+                "t_hit_p75": fmt4(t_stats["t_hit_p75"]),
+                "mdd_p25": fmt6(mdd_stats["mdd_p25"]),
+                "mdd_median": fmt6(mdd_stats["mdd_median"]),
+                "mdd_p75": fmt6(mdd_stats["mdd_p75"]),
             }
             out_rows.append(row_out)
 
@@ -179,8 +245,7 @@ def main():
     with open(OUT_CSV, "w", encoding="utf-8", newline="") as f:
         w = csv.DictWriter(f, fieldnames=fieldnames)
         w.writeheader()
-        for r in out_rows:
-            w.writerow(r)
+        w.writerows(out_rows)
 
     # Write JSON
     with open(OUT_JSON, "w", encoding="utf-8") as f:
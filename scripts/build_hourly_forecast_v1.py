@@ -2,6 +2,7 @@
 import csv
 import json
 import os
+from functools import lru_cache
 from typing import Optional, Dict, Any, List, Tuple
 
 SIGNAL_PATH = os.path.join("data", "hourly_signal.json")
@@ -54,16 +55,27 @@ def load_baseline_csv(path: str) -> List[Dict[str, str]]:
         return list(reader)
 
 
-def extract_probability_from_baseline(
-    baseline_path: str, target_pct: float, horizon_hours: int
-) -> Tuple[Optional[float], Dict[str, Any]]:
+BaselineKey = Tuple[float, int]
+
+
+def baseline_key(target_pct: float, horizon_hours: int) -> BaselineKey:
+    # Rounded so float targets like 0.5 / 0.50000001 map to the same pair.
+    return (round(target_pct, 4), int(horizon_hours))
+
+
+def load_baseline_index(baseline_path: str) -> Tuple[str, Dict[BaselineKey, Dict[str, Any]]]:
     """
-    Supports either:
-      - JSON baseline containing e.g. { "rows": [ { "target_pct":0.5, "horizon_hours":12, "p_hit":0.62, ...}, ... ] }
-      - CSV baseline containing columns like: target_pct, horizon_hours, p_hit
-    Returns: (p_hit, meta)
+    Returns (format, {(target_pct, horizon_hours): row}) for a baseline file.
+    Parsed once per (path, mtime); the first row for a pair wins.
     """
-    meta: Dict[str, Any] = {"baseline_path": baseline_path}
+    return _load_baseline_index_cached(baseline_path, os.stat(baseline_path).st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _load_baseline_index_cached(
+    baseline_path: str, mtime_ns: int
+) -> Tuple[str, Dict[BaselineKey, Dict[str, Any]]]:
+    index: Dict[BaselineKey, Dict[str, Any]] = {}
 
     if baseline_path.endswith(".json"):
         b = load_baseline_json(baseline_path)
@@ -74,51 +86,48 @@ def extract_probability_from_baseline(
         elif isinstance(b, list):
             rows = b
 
-        best = None
         for r in rows:
             try:
                 t = float(r.get("target_pct"))
                 h = int(float(r.get("horizon_hours")))
             except Exception:
                 continue
-            if abs(t - target_pct) < 1e-9 and h == horizon_hours:
-                best = r
-                break
-
-        if not best:
-            return None, {**meta, "reason": "pair_not_found_in_json_baseline"}
-
-        p_hit = safe_float(best.get("p_hit"))
-        meta.update(
-            {
-                "format": "json",
-                "matched_row": {
-                    "target_pct": target_pct,
-                    "horizon_hours": horizon_hours,
-                },
-            }
-        )
-        return p_hit, meta
+            index.setdefault(baseline_key(t, h), r)
+
+        return "json", index
 
     # CSV
-    rows = load_baseline_csv(baseline_path)
-    best = None
-    for r in rows:
+    for r in load_baseline_csv(baseline_path):
         t = safe_float(r.get("target_pct"))
         h = safe_float(r.get("horizon_hours"))
         if t is None or h is None:
             continue
-        if abs(t - target_pct) < 1e-9 and int(h) == horizon_hours:
-            best = r
-            break
+        index.setdefault(baseline_key(t, int(h)), r)
+
+    return "csv", index
+
+
+def extract_probability_from_baseline(
+    baseline_path: str, target_pct: float, horizon_hours: int
+) -> Tuple[Optional[float], Dict[str, Any]]:
+    """
+    Supports either:
+      - JSON baseline containing e.g. { "rows": [ { "target_pct":0.5, "horizon_hours":12, "p_hit":0.62, ...}, ... ] }
+      - CSV baseline containing columns like: target_pct, horizon_hours, p_hit
+    Returns: (p_hit, meta)
+    """
+    meta: Dict[str, Any] = {"baseline_path": baseline_path}
+
+    fmt, index = load_baseline_index(baseline_path)
+    best = index.get(baseline_key(target_pct, horizon_hours))
 
     if not best:
-        return None, {**meta, "reason": "pair_not_found_in_csv_baseline"}
+        return None, {**meta, "reason": f"pair_not_found_in_{fmt}_baseline"}
 
     p_hit = safe_float(best.get("p_hit"))
     meta.update(
         {
-            "format": "csv",
+            "format": fmt,
             "matched_row": {
                 "target_pct": target_pct,
                 "horizon_hours": horizon_hours,
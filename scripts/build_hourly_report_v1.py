@@ -3,7 +3,9 @@
 import csv
 import json
 import os
+import stat
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Tuple
 
 
@@ -36,8 +38,18 @@ def utc_now() -> str:
 
 
 def load_json(path: str) -> Optional[dict]:
-    if not os.path.isfile(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
         return None
+    return _load_json_cached(path, st.st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _load_json_cached(path: str, mtime_ns: int) -> Optional[dict]:
+    # Keyed on mtime so a rewritten file is re-read; callers must not mutate the result.
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
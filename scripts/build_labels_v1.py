@@ -3,13 +3,30 @@
 import csv
 import json
 import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from glob import glob
-from typing import Dict, List, Tuple, Optional
+from itertools import accumulate
+from operator import itemgetter
+from typing import Dict, Iterator, List, Tuple, Optional
 
 HISTORY_ROOT = os.path.join("data", "history")
 OUT_DIR = os.path.join("data", "labels")
 OUT_CSV = os.path.join(OUT_DIR, "labels_v1.csv")
 
+# History snapshot loading (I/O-bound: many small JSON files)
+LOAD_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+LOAD_BATCH = 64
+
+# Label compute fan-out (CPU-bound; only worth a pool for large backfills)
+LABEL_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_JOBS = 2000
+LABEL_CHUNK = 256
+
+# Labels CSV append buffer (bytes)
+WRITE_BUFFER = 1 << 20
+
 # Confirmed horizons (hours)
 HORIZONS = [12, 24, 36, 48, 60, 72, 84, 96]
 
@@ -19,6 +36,16 @@ THRESHOLDS = [0.5, 1.0, 2.0, 3.0, 5.0]
 # Candle compact format in history snapshots:
 # [ts_utc, open, high, low, close, volume]
 Candle = List[float]
+_HIGH = itemgetter(2)
+_LOW = itemgetter(3)
+
+
+@dataclass
+class MasterCandles:
+    ts: List[int]  # sorted candle timestamps (UTC seconds)
+    rows: List[Candle]  # candles aligned with ts
+    pos: Dict[int, int]  # ts -> index into ts / rows
+    breaks: List[int]  # breaks[i] = number of non-hourly steps in ts[:i + 1]
 
 
 def pct_change(new: float, base: float) -> float:
@@ -34,11 +61,28 @@ def fmt_thr(x: float) -> str:
     return str(x).replace(".", "p")
 
 
+# (thr_key, upside target multiplier, downside target multiplier) per threshold
+THRESHOLD_TABLE = [(fmt_thr(thr), 1.0 + thr / 100.0, 1.0 - thr / 100.0) for thr in THRESHOLDS]
+
+
 def load_json(path: str) -> dict:
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
+def iter_loaded_snapshots(paths: List[str]) -> Iterator[Tuple[str, dict]]:
+    """
+    Yield (path, parsed snapshot) in input order.
+
+    Files are read on a small thread pool so disk latency overlaps with
+    parsing; batches keep at most LOAD_BATCH snapshots in flight.
+    """
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as ex:
+        for start in range(0, len(paths), LOAD_BATCH):
+            batch = paths[start:start + LOAD_BATCH]
+            yield from zip(batch, ex.map(load_json, batch))
+
+
 def iter_history_files() -> List[str]:
     # data/history/YYYY-MM-DD/*.json
     pattern = os.path.join(HISTORY_ROOT, "*", "*.json")
@@ -50,9 +94,16 @@ def read_existing_keys() -> set:
         return set()
     keys = set()
     with open(OUT_CSV, "r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or "published_at_utc" not in header or "history_file" not in header:
+            return keys
+        pub_idx = header.index("published_at_utc")
+        file_idx = header.index("history_file")
+        need = max(pub_idx, file_idx) + 1
         for r in reader:
-            keys.add((r.get("published_at_utc"), r.get("history_file")))
+            if len(r) >= need:
+                keys.add((r[pub_idx], r[file_idx]))
     return keys
 
 
@@ -65,16 +116,20 @@ def ensure_out_header(fieldnames: List[str]):
         w.writerow(fieldnames)
 
 
-def build_master_candle_map(history_paths: List[str]) -> Dict[int, Candle]:
+def build_master_candle_map(history_paths: List[str]) -> Tuple[Dict[int, Candle], List[dict]]:
     """
     Build master candle map from all history snapshots:
       ts_utc -> [ts_utc, o, h, l, c, v]
     If duplicates exist for same ts_utc, we keep the first seen (stable).
+
+    Each snapshot is parsed exactly once; the few per-snapshot fields the
+    labelling loop needs are returned alongside the map (one dict per path,
+    in input order) so main() never re-reads the JSON.
     """
     master: Dict[int, Candle] = {}
+    snapshots: List[dict] = []
 
-    for p in history_paths:
-        snap = load_json(p)
+    for p, snap in iter_loaded_snapshots(history_paths):
         candles = snap.get("candles", {}).get("eth_usdt_1h", [])
         for c in candles:
             if not c or len(c) < 6:
@@ -83,7 +138,17 @@ def build_master_candle_map(history_paths: List[str]) -> Dict[int, Candle]:
             if ts not in master:
                 master[ts] = c
 
-    return master
+        entry_ts, entry_close = get_entry_ts_and_close_from_snapshot(snap)
+        snapshots.append({
+            "path": p,
+            "published_at_utc": snap.get("published_at_utc"),
+            "published_at_local": snap.get("published_at_local"),
+            "date": snap.get("date"),
+            "entry_ts": entry_ts,
+            "entry_close": entry_close,
+        })
+
+    return master, snapshots
 
 
 def get_entry_ts_and_close_from_snapshot(snap: dict) -> Tuple[Optional[int], Optional[float]]:
@@ -112,30 +177,56 @@ def get_entry_ts_and_close_from_snapshot(snap: dict) -> Tuple[Optional[int], Opt
     return entry_ts, entry_close
 
 
-def forward_window(master: Dict[int, Candle], entry_ts: int, hours: int) -> Optional[List[Candle]]:
+def index_master_candles(master: Dict[int, Candle]) -> MasterCandles:
+    ts_sorted = sorted(master)
+
+    breaks: List[int] = []
+    n_breaks = 0
+    prev = None
+    for ts in ts_sorted:
+        if prev is not None and ts - prev != 3600:
+            n_breaks += 1
+        breaks.append(n_breaks)
+        prev = ts
+
+    return MasterCandles(
+        ts=ts_sorted,
+        rows=[master[ts] for ts in ts_sorted],
+        pos={ts: i for i, ts in enumerate(ts_sorted)},
+        breaks=breaks,
+    )
+
+
+def forward_window(candles: MasterCandles, entry_ts: int, hours: int) -> Optional[List[Candle]]:
     """
     Returns candles for (entry_ts + 1h) ... (entry_ts + hours*h)
     Requires exact hourly continuity.
+
+    The window is a slice of the time-sorted candle list. It is continuous
+    when no non-hourly step falls inside it, which the prefix break counts
+    answer in O(1).
     """
-    out = []
-    for k in range(1, hours + 1):
-        ts = entry_ts + 3600 * k
-        c = master.get(ts)
-        if c is None:
-            return None
-        out.append(c)
-    return out
+    start = candles.pos.get(entry_ts + 3600)
+    if start is None:
+        return None
+    end = start + hours
+    if end > len(candles.ts) or candles.breaks[end - 1] != candles.breaks[start]:
+        return None
+    return candles.rows[start:end]
 
 
-def compute_continuous_labels(entry_close: float, fwd: List[Candle]) -> dict:
-    highs = [c[2] for c in fwd]
-    lows = [c[3] for c in fwd]
-    closes = [c[4] for c in fwd]
+def running_extremes(fwd: List[Candle]) -> Tuple[List[float], List[float]]:
+    """
+    Prefix max of highs and prefix min of lows over the forward window.
+    Index h-1 holds the extreme over the first h hours, so every horizon
+    and threshold can be read from one pass.
+    """
+    running_max_high = list(accumulate(map(_HIGH, fwd), max))
+    running_min_low = list(accumulate(map(_LOW, fwd), min))
+    return running_max_high, running_min_low
 
-    max_high = max(highs)
-    min_low = min(lows)
-    end_close = closes[-1]
 
+def compute_continuous_labels(entry_close: float, max_high: float, min_low: float, end_close: float) -> dict:
     return {
         "max_up_pct": round(pct_change(max_high, entry_close), 4),
         "max_down_pct": round(pct_change(min_low, entry_close), 4),
@@ -144,7 +235,11 @@ def compute_continuous_labels(entry_close: float, fwd: List[Candle]) -> dict:
     }
 
 
-def compute_time_to_hit_and_mdd(entry_close: float, fwd96: List[Candle]) -> dict:
+def compute_time_to_hit_and_mdd(
+    entry_close: float,
+    running_max_high: List[float],
+    running_min_low: List[float],
+) -> dict:
     """
     Compute time-to-hit (earliest hour) for thresholds up to 96h,
     and max drawdown before the first hit of upside target.
@@ -152,48 +247,35 @@ def compute_time_to_hit_and_mdd(entry_close: float, fwd96: List[Candle]) -> dict
     NOTE: Drawdown is clamped to <= 0.0. If price never goes below entry
     before the upside hit, drawdown is reported as 0.0 (not positive).
     """
-    running_min_low = []
-    cur_min = float("inf")
-    for c in fwd96:
-        low = c[3]
-        cur_min = min(cur_min, low)
-        running_min_low.append(cur_min)
-
-    running_max_high = []
-    cur_max = -float("inf")
-    for c in fwd96:
-        high = c[2]
-        cur_max = max(cur_max, high)
-        running_max_high.append(cur_max)
+    # Running extremes are monotonic, so the first hit of any target is a
+    # binary search and the lowest low before hour t is running_min_low[t - 1].
+    neg_running_min_low = [-x for x in running_min_low]
+    n = len(running_max_high)
 
     out = {}
 
-    for thr in THRESHOLDS:
-        thr_key = fmt_thr(thr)
-
+    for thr_key, up_mult, dn_mult in THRESHOLD_TABLE:
         # Upside hit time
         hit_up_t = ""
-        target_up = entry_close * (1.0 + thr / 100.0)
-        for i, rmh in enumerate(running_max_high):
-            if rmh >= target_up:
-                hit_up_t = str(i + 1)  # hours are 1-indexed
-                break
+        target_up = entry_close * up_mult
+        i = bisect_left(running_max_high, target_up)
+        if i < n:
+            hit_up_t = str(i + 1)  # hours are 1-indexed
         out[f"t_hit_up_{thr_key}"] = hit_up_t
 
         # Downside hit time
         hit_dn_t = ""
-        target_dn = entry_close * (1.0 - thr / 100.0)
-        for i, rml in enumerate(running_min_low):
-            if rml <= target_dn:
-                hit_dn_t = str(i + 1)
-                break
+        target_dn = entry_close * dn_mult
+        i = bisect_left(neg_running_min_low, -target_dn)
+        if i < n:
+            hit_dn_t = str(i + 1)
         out[f"t_hit_down_{thr_key}"] = hit_dn_t
 
         # MDD before upside hit (within 96h window) — clamped to <= 0
         mdd_val = ""
         if hit_up_t != "":
             t = int(hit_up_t)
-            min_before = min(running_min_low[:t])
+            min_before = running_min_low[t - 1]
             mdd_pct = round(pct_change(min_before, entry_close), 4)
             mdd_pct = min(0.0, mdd_pct)  # clamp: drawdown cannot be positive
             mdd_val = str(mdd_pct)
@@ -202,6 +284,68 @@ def compute_time_to_hit_and_mdd(entry_close: float, fwd96: List[Candle]) -> dict
     return out
 
 
+def compute_label_values(candles: MasterCandles, entry_ts: int, entry_close: float) -> Optional[List[str]]:
+    """
+    Label values for one snapshot in build_header() order (after the six
+    identity columns), or None when the 96h forward window is incomplete.
+    """
+    fwd96 = forward_window(candles, entry_ts, 96)
+    if fwd96 is None:
+        return None
+
+    running_max_high, running_min_low = running_extremes(fwd96)
+    values: List[str] = []
+
+    # Continuous labels per horizon (first h hours, read from the prefix extremes)
+    for h in HORIZONS:
+        cont = compute_continuous_labels(
+            entry_close, running_max_high[h - 1], running_min_low[h - 1], fwd96[h - 1][4]
+        )
+        values += [
+            str(cont["max_up_pct"]),
+            str(cont["max_down_pct"]),
+            str(cont["close_change_pct"]),
+            str(cont["range_pct"]),
+        ]
+
+    # Time-to-hit + MDD (once, up to 96h); keys are already in header order
+    ttm = compute_time_to_hit_and_mdd(entry_close, running_max_high, running_min_low)
+    values += ttm.values()
+
+    return values
+
+
+_worker_candles: Optional[MasterCandles] = None
+
+
+def _init_label_worker(candles: MasterCandles):
+    global _worker_candles
+    _worker_candles = candles
+
+
+def _label_job(job: Tuple[int, float]) -> Optional[List[str]]:
+    return compute_label_values(_worker_candles, job[0], job[1])
+
+
+def compute_label_rows(candles: MasterCandles, jobs: List[Tuple[int, float]]) -> List[Optional[List[str]]]:
+    """
+    Compute label values for each (entry_ts, entry_close) job, in job order.
+
+    Snapshots are independent, so large backfills are spread over a process
+    pool (each worker receives the candle index once); small incremental
+    runs stay in-process where pool start-up would dominate.
+    """
+    if LABEL_WORKERS <= 1 or len(jobs) < PARALLEL_MIN_JOBS:
+        return [compute_label_values(candles, ts, close) for ts, close in jobs]
+
+    with ProcessPoolExecutor(
+        max_workers=LABEL_WORKERS,
+        initializer=_init_label_worker,
+        initargs=(candles,),
+    ) as ex:
+        return list(ex.map(_label_job, jobs, chunksize=LABEL_CHUNK))
+
+
 def build_header() -> List[str]:
     fields = [
         "published_at_utc",
@@ -237,11 +381,13 @@ def main():
         print("No history files found under data/history/. Nothing to label yet.")
         return
 
-    master = build_master_candle_map(history_paths)
+    master, snapshots = build_master_candle_map(history_paths)
     if not master:
         print("No candles found in history snapshots. Cannot build labels.")
         return
 
+    candles = index_master_candles(master)
+
     existing = read_existing_keys()
     header = build_header()
     ensure_out_header(header)
@@ -250,56 +396,40 @@ def main():
     skipped_dupe = 0
     skipped_missing = 0
 
-    with open(OUT_CSV, "a", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=header)
+    # Select snapshots to label first; compute may fan out, writing stays serial and ordered.
+    pending: List[List[str]] = []
+    jobs: List[Tuple[int, float]] = []
 
-        for path in history_paths:
-            rel = os.path.relpath(path, start=".")
-            snap = load_json(path)
+    for snap in snapshots:
+        rel = os.path.relpath(snap["path"], start=".")
 
-            pub_utc = snap.get("published_at_utc")
-            pub_local = snap.get("published_at_local")
-            date_local = snap.get("date")
+        pub_utc = snap["published_at_utc"]
+        pub_local = snap["published_at_local"]
+        date_local = snap["date"]
 
-            key = (pub_utc, rel)
-            if key in existing:
-                skipped_dupe += 1
-                continue
+        key = (pub_utc, rel)
+        if key in existing:
+            skipped_dupe += 1
+            continue
 
-            entry_ts, entry_close = get_entry_ts_and_close_from_snapshot(snap)
-            if entry_ts is None or entry_close is None:
-                skipped_missing += 1
-                continue
+        entry_ts, entry_close = snap["entry_ts"], snap["entry_close"]
+        if entry_ts is None or entry_close is None:
+            skipped_missing += 1
+            continue
 
-            row = {
-                "published_at_utc": pub_utc,
-                "published_at_local": pub_local,
-                "date_local": date_local,
-                "history_file": rel,
-                "entry_ts_utc": str(entry_ts),
-                "entry_close": str(entry_close),
-            }
+        pending.append([pub_utc, pub_local, date_local, rel, str(entry_ts), str(entry_close)])
+        jobs.append((entry_ts, entry_close))
 
+    with open(OUT_CSV, "a", encoding="utf-8", newline="", buffering=WRITE_BUFFER) as f:
+        writer = csv.writer(f)
+
+        for row, values in zip(pending, compute_label_rows(candles, jobs)):
             # Need 96h forward window for time-to-hit/mdd; if not available, skip entirely for now.
-            fwd96 = forward_window(master, entry_ts, 96)
-            if fwd96 is None:
+            if values is None:
                 skipped_missing += 1
                 continue
 
-            # Continuous labels per horizon
-            for h in HORIZONS:
-                fwd = fwd96[:h]  # first h hours
-                cont = compute_continuous_labels(entry_close, fwd)
-                row[f"max_up_pct_{h}"] = str(cont["max_up_pct"])
-                row[f"max_down_pct_{h}"] = str(cont["max_down_pct"])
-                row[f"close_change_pct_{h}"] = str(cont["close_change_pct"])
-                row[f"range_pct_{h}"] = str(cont["range_pct"])
-
-            # Time-to-hit + MDD (once, up to 96h)
-            ttm = compute_time_to_hit_and_mdd(entry_close, fwd96)
-            row.update(ttm)
-
-            writer.writerow(row)
+            writer.writerow(row + values)
             added += 1
 
     print(f"Labels written to: {OUT_CSV}")
@@ -2,15 +2,127 @@
 
 import os
 import json
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from _signal_core import loads
 
 HISTORY_DIR = os.path.join("data", "history")
 
+# Per-file scan results keyed by path and (mtime_ns, size); kept out of
+# data/ so it is never committed or picked up by the diagnostics.
+SCAN_CACHE = os.path.join(".cache", "debug_labels_state.json")
+SCAN_CACHE_VERSION = 2
+
+# Parsed published_at_utc strings, memoized per string.
+_ts_cache: Dict[str, Optional[datetime]] = {}
+
 
 def iso(dt):
     return dt.isoformat(timespec="seconds") if dt else None
 
 
+def parse_ts(ts: str) -> Optional[datetime]:
+    if ts in _ts_cache:
+        return _ts_cache[ts]
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        # Snapshots are written in UTC; only convert when the offset differs.
+        if ts.endswith(("+00:00", "Z")):
+            dt = dt.replace(tzinfo=timezone.utc)
+        else:
+            dt = dt.astimezone(timezone.utc)
+    except Exception:
+        dt = None
+    _ts_cache[ts] = dt
+    return dt
+
+
+def extract_candle_ts(candles) -> List[int]:
+    """
+    Open timestamps of compact candles ([ts_utc, o, h, l, c, v]).
+    The shape is checked once for the whole list; a list that does not
+    match the snapshot schema contributes no candles.
+    """
+    if not isinstance(candles, list):
+        return []
+    if candles and not (isinstance(candles[0], list) and candles[0]):
+        return []
+    try:
+        return [int(c[0]) for c in candles]
+    except Exception:
+        return []
+
+
+def iter_history(root: str) -> Iterator[os.DirEntry]:
+    """Snapshot JSON entries under root (recursive), skipping index.json."""
+    with os.scandir(root) as it:
+        for e in it:
+            if e.is_dir(follow_symlinks=False):
+                yield from iter_history(e.path)
+            elif e.name.endswith(".json") and e.name != "index.json":
+                yield e
+
+
+def scan_snapshot(path: str) -> Optional[list]:
+    """
+    [published_at_utc, candle count, candle open timestamps] for one
+    snapshot, or None if it cannot be read.
+    """
+    try:
+        with open(path, "rb") as f:
+            snap = loads(f.read())
+    except Exception:
+        return None
+
+    candles = (
+        snap.get("candles", {})
+            .get("eth_usdt_1h", [])
+    )
+
+    # candles are compact lists: [ts_utc, o, h, l, c, v]
+    return [snap.get("published_at_utc"), len(candles), extract_candle_ts(candles)]
+
+
+def load_scan_cache() -> Dict[str, list]:
+    try:
+        with open(SCAN_CACHE, "rb") as f:
+            cache = loads(f.read())
+    except Exception:
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != SCAN_CACHE_VERSION:
+        return {}
+    files = cache.get("files")
+    return files if isinstance(files, dict) else {}
+
+
+def save_scan_cache(files: Dict[str, list]) -> None:
+    try:
+        os.makedirs(os.path.dirname(SCAN_CACHE), exist_ok=True)
+        tmp = SCAN_CACHE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": SCAN_CACHE_VERSION, "files": files}, separators=(",", ":")))
+        os.replace(tmp, SCAN_CACHE)
+    except OSError:
+        pass
+
+
+def hour_bitmap(ts_sorted: List[int], anchor_ts: int, hours: int) -> bytearray:
+    """
+    One byte per hour offset 0..hours from anchor_ts: 1 if a candle opens
+    exactly on that hour. Built from the bisected slice of ts_sorted.
+    """
+    bits = bytearray(hours + 1)
+    lo = bisect_left(ts_sorted, anchor_ts)
+    hi = bisect_right(ts_sorted, anchor_ts + 3600 * hours)
+    for t in ts_sorted[lo:hi]:
+        k, rem = divmod(t - anchor_ts, 3600)
+        if not rem:
+            bits[k] = 1
+    return bits
+
+
 def main():
     print("\nLABEL DEBUG REPORT")
     print("==================\n")
@@ -19,13 +131,8 @@ def main():
         print("ERROR: data/history directory not found.")
         return
 
-    files = []
-    for root, _, fnames in os.walk(HISTORY_DIR):
-        for f in fnames:
-            if f.endswith(".json") and f != "index.json":
-                files.append(os.path.join(root, f))
-
-    files.sort()
+    entries = {e.path: e for e in iter_history(HISTORY_DIR)}
+    files = sorted(entries)
     print(f"History files found: {len(files)}")
 
     if not files:
@@ -36,43 +143,42 @@ def main():
     candle_ts = set()
     candle_count_total = 0
 
+    # Only files whose mtime/size changed since the last run are re-parsed.
+    cache = load_scan_cache()
+    scanned: Dict[str, list] = {}
+    dirty = False
+
     for path in files:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                snap = json.load(f)
-        except Exception:
+            st = entries[path].stat()
+        except OSError:
             continue
+        stamp = [st.st_mtime_ns, st.st_size]
 
-        pub_utc = snap.get("published_at_utc")
-        pub_dt = None
-        if pub_utc:
-            try:
-                pub_dt = datetime.fromisoformat(pub_utc.replace("Z", "+00:00")).astimezone(timezone.utc)
-            except Exception:
-                pub_dt = None
-
-        candles = (
-            snap.get("candles", {})
-                .get("eth_usdt_1h", [])
-        )
-
-        # candles are compact lists: [ts_utc, o, h, l, c, v]
-        for c in candles:
-            if not isinstance(c, list) or len(c) < 1:
-                continue
-            try:
-                ts = int(c[0])
-            except Exception:
+        entry = cache.get(path)
+        if not isinstance(entry, list) or entry[:2] != stamp:
+            result = scan_snapshot(path)
+            if result is None:
                 continue
-            candle_ts.add(ts)
-            candle_count_total += 1
+            entry = stamp + result
+            dirty = True
+        scanned[path] = entry
+
+        _, _, pub_utc, n_candles, ts_vals = entry
+        pub_dt = parse_ts(pub_utc) if pub_utc else None
+
+        candle_ts.update(ts_vals)
+        candle_count_total += len(ts_vals)
 
         snapshots.append({
             "file": path,
             "published_at": pub_dt,
-            "candles": len(candles),
+            "candles": n_candles,
         })
 
+    if dirty or len(scanned) != len(cache):
+        save_scan_cache(scanned)
+
     snapshots = [s for s in snapshots if s["published_at"]]
     snapshots.sort(key=lambda x: x["published_at"])
 
@@ -109,26 +215,21 @@ def main():
     # For a robust check, use the oldest candle timestamp as an anchor.
     anchor_ts = ts_sorted[0]  # earliest candle open
     anchor_dt = datetime.fromtimestamp(anchor_ts, tz=timezone.utc)
+    hours_present = hour_bitmap(ts_sorted, anchor_ts, 120)
 
     print("\nForward window availability check (from oldest candle open):")
     missing_any = False
     for h in [12, 24, 36, 48, 60, 72, 84, 96]:
-        target_ts = anchor_ts + 3600 * h
-        exists = target_ts in candle_ts
+        exists = bool(hours_present[h])
         status = "OK" if exists else "MISSING"
         if not exists:
             missing_any = True
         print(f"  +{h:>3}h : {status}")
 
     print("\nContinuity check (first 120 hours from oldest candle):")
-    gaps = 0
-    first_missing = None
-    for k in range(1, 121):
-        t = anchor_ts + 3600 * k
-        if t not in candle_ts:
-            gaps += 1
-            if first_missing is None:
-                first_missing = k
+    window = hours_present[1:121]
+    gaps = window.count(0)
+    first_missing = window.find(0) + 1 if gaps else None
     if gaps == 0:
         print("  OK: no gaps detected in first 120 hours.")
     else:
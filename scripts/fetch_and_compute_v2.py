@@ -1,12 +1,12 @@
 #!/usr/bin/env python
 
-import requests
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import pytz
 
-KUCOIN_BASE = "https://api.kucoin.com/api/v1/market/candles"
+from _signal_core import fetch_kline_response, write_text_atomic
 
 SYMBOLS = {
     "eth_usdt": "ETH-USDT",
@@ -17,57 +17,47 @@ SYMBOLS = {
 INTERVAL = "1hour"
 LIMIT = 400  # IMPORTANT: wider history
 
+LOCAL_TZ = pytz.timezone("Africa/Johannesburg")
+
 
 def fetch_candles(symbol):
-    params = {
-        "symbol": symbol,
-        "type": INTERVAL,
-    }
-    response = requests.get(KUCOIN_BASE, params=params)
-    data = response.json()
+    data = fetch_kline_response(symbol, INTERVAL)
 
     if "data" not in data:
         raise Exception(f"Failed to fetch {symbol}: {data}")
 
-    candles = data["data"][:LIMIT]
-
-    # Reverse (KuCoin gives newest first)
-    candles = list(reversed(candles))
-
-    # Convert to numeric format
-    parsed = []
-    for c in candles:
-        parsed.append([
+    # KuCoin gives newest first; parse straight into oldest-first rows.
+    # Rows are read-only downstream, so plain tuples are enough.
+    return [
+        (
             int(c[0]),      # timestamp
             float(c[1]),    # open
             float(c[2]),    # close
             float(c[3]),    # high
             float(c[4]),    # low
             float(c[5]),    # volume
-        ])
-
-    return parsed
+        )
+        for c in reversed(data["data"][:LIMIT])
+    ]
 
 
 def compute_24h_stats(candles):
     last_24 = candles[-24:]
-    opens = [c[1] for c in last_24]
-    highs = [c[3] for c in last_24]
-    lows = [c[4] for c in last_24]
-    closes = [c[2] for c in last_24]
+    # Only the high/low columns need a reduction; open/close are endpoints.
+    high = max([c[3] for c in last_24])
+    low = min([c[4] for c in last_24])
+    open_ = last_24[0][1]
 
     return {
-        "high": max(highs),
-        "low": min(lows),
-        "open": opens[0],
-        "close": closes[-1],
-        "gap_pct": round((max(highs) - min(lows)) / opens[0] * 100, 2),
+        "high": high,
+        "low": low,
+        "open": open_,
+        "close": last_24[-1][2],
+        "gap_pct": round((high - low) / open_ * 100, 2),
     }
 
 
 def build_integrity(candles, symbol):
-    tz_local = pytz.timezone("Africa/Johannesburg")
-
     first = candles[0][0]
     last = candles[-1][0]
 
@@ -78,8 +68,8 @@ def build_integrity(candles, symbol):
         "returned_count": len(candles),
         "first_candle_open_time_utc": datetime.fromtimestamp(first, timezone.utc).isoformat(),
         "last_candle_open_time_utc": datetime.fromtimestamp(last, timezone.utc).isoformat(),
-        "first_candle_open_time_local": datetime.fromtimestamp(first, tz_local).isoformat(),
-        "last_candle_open_time_local": datetime.fromtimestamp(last, tz_local).isoformat(),
+        "first_candle_open_time_local": datetime.fromtimestamp(first, LOCAL_TZ).isoformat(),
+        "last_candle_open_time_local": datetime.fromtimestamp(last, LOCAL_TZ).isoformat(),
     }
 
 
@@ -87,7 +77,7 @@ def run():
     print("RUNNING FETCH_AND_COMPUTE_V2")
 
     now_utc = datetime.now(timezone.utc)
-    now_local = now_utc.astimezone(pytz.timezone("Africa/Johannesburg"))
+    now_local = now_utc.astimezone(LOCAL_TZ)
 
     result = {
         "date": now_local.strftime("%Y-%m-%d"),
@@ -98,9 +88,11 @@ def run():
         "candles": {},
     }
 
-    for key, symbol in SYMBOLS.items():
-        candles = fetch_candles(symbol)
+    # Fetch all symbols concurrently; results are consumed in SYMBOLS order.
+    with ThreadPoolExecutor(max_workers=len(SYMBOLS)) as ex:
+        fetched = list(ex.map(fetch_candles, SYMBOLS.values()))
 
+    for (key, symbol), candles in zip(SYMBOLS.items(), fetched):
         result["candles"][f"{key}_1h"] = candles
         result["integrity"][key] = build_integrity(candles, symbol)
 
@@ -108,9 +100,7 @@ def run():
         result[key] = stats
 
     os.makedirs("data", exist_ok=True)
-
-    with open("data/hourly_signal.json", "w") as f:
-        json.dump(result, f, indent=2)
+    write_text_atomic("data/hourly_signal.json", json.dumps(result, indent=2))
 
     print("DONE — hourly_signal.json written")
 
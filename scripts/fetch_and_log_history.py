@@ -3,208 +3,20 @@
 import json
 import os
 from datetime import datetime, timezone
-from statistics import mean
 
-import requests
-
-try:
-    from zoneinfo import ZoneInfo  # Python 3.9+
-except ImportError:
-    from backports.zoneinfo import ZoneInfo  # type: ignore
-
-
-KUCOIN_URL = "https://api.kucoin.com/api/v1/market/candles"
-LOCAL_TZ = ZoneInfo("Africa/Johannesburg")
-
-
-def fetch_klines(symbol: str, interval: str = "1hour", limit: int = 96):
-    params = {"symbol": symbol, "type": interval}
-    resp = requests.get(KUCOIN_URL, params=params, timeout=15)
-    resp.raise_for_status()
-    raw = resp.json()
-
-    data = raw.get("data", [])
-    candles = []
-
-    for entry in data:
-        if len(entry) < 7:
-            continue
-
-        ts = int(entry[0])
-        open_dt_utc = datetime.fromtimestamp(ts, tz=timezone.utc)
-        open_dt_local = open_dt_utc.astimezone(LOCAL_TZ)
-
-        candles.append(
-            {
-                "open_time": open_dt_local,
-                "open_time_utc": open_dt_utc,
-                "open": float(entry[1]),
-                "close": float(entry[2]),
-                "high": float(entry[3]),
-                "low": float(entry[4]),
-                "volume": float(entry[6]),
-            }
-        )
-
-    candles.sort(key=lambda c: c["open_time"])
-    return candles[-limit:]
-
-
-def _window_slice(candles, start_idx_inclusive, end_idx_exclusive):
-    w = candles[start_idx_inclusive:end_idx_exclusive]
-    return w if w else None
-
-
-def _range_high_low(window):
-    return max(c["high"] for c in window), min(c["low"] for c in window)
-
-
-def compute_24h_stats(candles):
-    if len(candles) < 24:
-        raise ValueError("Not enough candles for 24h stats")
-
-    w = candles[-24:]
-    high, low = _range_high_low(w)
-
-    return {
-        "high": round(high, 6),
-        "low": round(low, 6),
-        "open": round(w[0]["open"], 6),
-        "close": round(w[-1]["close"], 6),
-        "gap_pct": round((high - low) / low * 100, 2) if low else 0.0,
-    }
-
-
-def compute_prior_24h_range(candles):
-    if len(candles) < 48:
-        return {"high": None, "low": None}
-    w = candles[-48:-24]
-    high, low = _range_high_low(w)
-    return {"high": round(high, 6), "low": round(low, 6)}
-
-
-def compute_first_4h_of_current_24h(candles):
-    if len(candles) < 24:
-        return {"high": None, "low": None}
-    w = candles[-24:][:4]
-    if len(w) < 4:
-        return {"high": None, "low": None}
-    high, low = _range_high_low(w)
-    return {"high": round(high, 6), "low": round(low, 6)}
-
-
-def compute_wilder_atr_and_trend(candles, period=14, lookback=10):
-    if len(candles) < period + 1:
-        return None, "flat"
-
-    trs = []
-    for i in range(1, len(candles)):
-        high = candles[i]["high"]
-        low = candles[i]["low"]
-        prev_close = candles[i - 1]["close"]
-        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-        trs.append(tr)
-
-    if len(trs) < period:
-        return None, "flat"
-
-    atrs = []
-    atr0 = mean(trs[:period])
-    atrs.append(atr0)
-
-    for j in range(period, len(trs)):
-        prev = atrs[-1]
-        atr = (prev * (period - 1) + trs[j]) / period
-        atrs.append(atr)
-
-    latest = atrs[-1]
-
-    if len(atrs) < lookback:
-        return round(latest, 4), "flat"
-
-    base = atrs[-lookback]
-    change_pct = ((latest - base) / base * 100) if base else 0.0
-
-    if change_pct > 5:
-        trend = "rising"
-    elif change_pct < -5:
-        trend = "falling"
-    else:
-        trend = "flat"
-
-    return round(latest, 4), trend
-
-
-def compute_early_breakout_rolling(candles):
-    if len(candles) < 48:
-        return False, "Not enough candles for rolling breakout."
-    prior_24 = candles[-48:-24]
-    first_4 = candles[-24:-20]
-    prev_high, prev_low = _range_high_low(prior_24)
-
-    broke_above = any(c["high"] > prev_high for c in first_4)
-    broke_below = any(c["low"] < prev_low for c in first_4)
-
-    if broke_above and broke_below:
-        return True, "Broke above and below prior 24h range in first 4h (rolling)."
-    if broke_above:
-        return True, "Broke above prior 24h high in first 4h (rolling)."
-    if broke_below:
-        return True, "Broke below prior 24h low in first 4h (rolling)."
-    return False, "No early breakout (rolling)."
-
-
-def compute_intraday_momentum_rolling(candles, atr):
-    if len(candles) < 24:
-        return "sideways"
-    w = candles[-24:]
-    diff = w[-1]["close"] - w[0]["open"]
-    if not atr or abs(diff) < 0.3 * atr:
-        return "sideways"
-    return "up" if diff > 0 else "down"
-
-
-def build_integrity_meta(symbol, interval, requested_limit, candles, now_local):
-    now_utc = now_local.astimezone(timezone.utc)
-
-    def iso(dt):
-        return dt.isoformat(timespec="seconds") if dt else None
-
-    last_utc = candles[-1]["open_time_utc"] if candles else None
-    freshness_min = round((now_utc - last_utc).total_seconds() / 60.0, 2) if last_utc else None
-
-    returned_count = len(candles)
-    w_last_24 = _window_slice(candles, -24, None) if returned_count >= 24 else None
-    w_prior_24 = _window_slice(candles, -48, -24) if returned_count >= 48 else None
-    w_first_4 = _window_slice(candles, -24, -20) if returned_count >= 24 else None
-
-    def win_bounds(w):
-        if not w:
-            return None
-        return {
-            "start_local": iso(w[0]["open_time"]),
-            "end_local": iso(w[-1]["open_time"]),
-            "start_utc": iso(w[0]["open_time_utc"]),
-            "end_utc": iso(w[-1]["open_time_utc"]),
-        }
-
-    return {
-        "symbol": symbol,
-        "source": "kucoin",
-        "interval": interval,
-        "requested_limit": requested_limit,
-        "returned_count": returned_count,
-        "first_candle_open_time_local": iso(candles[0]["open_time"]) if candles else None,
-        "last_candle_open_time_local": iso(candles[-1]["open_time"]) if candles else None,
-        "first_candle_open_time_utc": iso(candles[0]["open_time_utc"]) if candles else None,
-        "last_candle_open_time_utc": iso(candles[-1]["open_time_utc"]) if candles else None,
-        "data_freshness_minutes": freshness_min,
-        "windows": {
-            "last_24h": win_bounds(w_last_24),
-            "prior_24h": win_bounds(w_prior_24),
-            "first_4h_current_24h": win_bounds(w_first_4),
-        },
-    }
+from _signal_core import (
+    LOCAL_TZ,
+    build_integrity_meta,
+    compute_24h_stats,
+    compute_early_breakout_rolling,
+    compute_first_4h_of_current_24h,
+    compute_intraday_momentum_rolling,
+    compute_prior_24h_range,
+    compute_rolling_windows,
+    compute_wilder_atr_and_trend,
+    fetch_klines_many,
+    write_text_atomic,
+)
 
 
 def compact_candles(candles):
@@ -212,11 +24,17 @@ def compact_candles(candles):
     Compact, forecast-friendly candle format:
       [ts_utc, o, h, l, c, v]
     """
-    out = []
-    for c in candles:
-        ts = int(c["open_time_utc"].timestamp())
-        out.append([ts, c["open"], c["high"], c["low"], c["close"], c["volume"]])
-    return out
+    return [
+        list(row)
+        for row in zip(
+            candles.ts,
+            candles.open,
+            candles.high,
+            candles.low,
+            candles.close,
+            candles.volume,
+        )
+    ]
 
 
 def main():
@@ -225,31 +43,35 @@ def main():
 
     now_local = datetime.now(LOCAL_TZ)
     now_utc = now_local.astimezone(timezone.utc)
+    today = now_local.date().isoformat()
+
+    eth_usdt, btc_usdt, eth_btc = fetch_klines_many(
+        ("ETH-USDT", "BTC-USDT", "ETH-BTC"), interval=interval, limit=limit
+    )
 
-    eth_usdt = fetch_klines("ETH-USDT", interval=interval, limit=limit)
-    btc_usdt = fetch_klines("BTC-USDT", interval=interval, limit=limit)
-    eth_btc = fetch_klines("ETH-BTC", interval=interval, limit=limit)
+    # The prior-24h / first-4h ranges feed three helpers; reduce them once.
+    eth_usdt_windows = compute_rolling_windows(eth_usdt)
 
-    eth_usdt_stats = compute_24h_stats(eth_usdt)
+    eth_usdt_stats = compute_24h_stats(eth_usdt, eth_usdt_windows)
     btc_usdt_stats = compute_24h_stats(btc_usdt)
     eth_btc_stats = compute_24h_stats(eth_btc)
 
-    prior_24 = compute_prior_24h_range(eth_usdt)
-    first_4h = compute_first_4h_of_current_24h(eth_usdt)
+    prior_24 = compute_prior_24h_range(eth_usdt, eth_usdt_windows)
+    first_4h = compute_first_4h_of_current_24h(eth_usdt, eth_usdt_windows)
 
     atr, atr_trend = compute_wilder_atr_and_trend(eth_usdt)
-    early_flag, early_desc = compute_early_breakout_rolling(eth_usdt)
+    early_flag, early_desc = compute_early_breakout_rolling(eth_usdt, windows=eth_usdt_windows)
     momentum = compute_intraday_momentum_rolling(eth_usdt, atr)
 
     payload = {
-        "date": now_local.date().isoformat(),
+        "date": today,
         "timezone": "Africa/Johannesburg",
         "published_at_local": now_local.isoformat(timespec="seconds"),
         "published_at_utc": now_utc.isoformat(timespec="seconds"),
         "integrity": {
-            "eth_usdt": build_integrity_meta("ETH-USDT", interval, limit, eth_usdt, now_local),
-            "btc_usdt": build_integrity_meta("BTC-USDT", interval, limit, btc_usdt, now_local),
-            "eth_btc": build_integrity_meta("ETH-BTC", interval, limit, eth_btc, now_local),
+            "eth_usdt": build_integrity_meta("ETH-USDT", interval, limit, eth_usdt, now_utc),
+            "btc_usdt": build_integrity_meta("BTC-USDT", interval, limit, btc_usdt, now_utc),
+            "eth_btc": build_integrity_meta("ETH-BTC", interval, limit, eth_btc, now_utc),
         },
         "eth_usdt": eth_usdt_stats,
         "btc_usdt": btc_usdt_stats,
@@ -266,17 +88,18 @@ def main():
         },
     }
 
-    day_dir = os.path.join("data", "history", now_local.date().isoformat())
+    day_dir = os.path.join("data", "history", today)
     os.makedirs(day_dir, exist_ok=True)
 
     ts_name = now_utc.strftime("%Y-%m-%dT%H-%M-%SZ")
     out_path = os.path.join(day_dir, f"{ts_name}.json")
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(payload, f, indent=2)
+    text = json.dumps(payload, indent=2)
+    # Readers (update_history_index) never see a half-written snapshot.
+    write_text_atomic(out_path, text)
 
     print(f"Wrote history snapshot: {out_path}")
-    print(json.dumps(payload, indent=2))
+    print(text)
 
 
 if __name__ == "__main__":
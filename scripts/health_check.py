@@ -2,20 +2,49 @@
 
 import argparse
 import csv
-import json
 import os
-from collections import defaultdict
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from bisect import bisect_left
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
+
+from _signal_core import loads
+
+try:
+    import ijson  # optional, reads integrity.eth_usdt without parsing the rest
+except ImportError:
+    ijson = None
 
 LOCAL_TZ = timezone(timedelta(hours=2))  # Africa/Johannesburg (SAST)
+INFO_LIMIT = 50
+SNAPSHOT_READ_WORKERS = 16
+# Below this size a full parse is cheaper than setting up the stream. The
+# integrity block sits near the top of a snapshot, so small stream buffers
+# let ijson stop after reading a few KB of a ~40 KB file.
+SNAPSHOT_STREAM_MIN_BYTES = 4096
+SNAPSHOT_STREAM_BUF_SIZE = 4096
+LOCAL_OFFSET_S = int(LOCAL_TZ.utcoffset(None).total_seconds())
+EPOCH_DATE = date(1970, 1, 1)
 
 
 @dataclass
 class Findings:
-    fails: list
-    warns: list
-    infos: list
+    fails: list = field(default_factory=list)
+    warns: list = field(default_factory=list)
+    # print_report shows only the first INFO_LIMIT infos; later ones are
+    # counted, not stored, so months of per-day lines stay bounded.
+    infos: list = field(default_factory=list)
+    infos_overflow: int = 0
+
+    def info(self, msg: str) -> None:
+        if len(self.infos) < INFO_LIMIT:
+            self.infos.append(msg)
+        else:
+            self.infos_overflow += 1
 
 
 def parse_iso(dt_str: str) -> datetime:
@@ -25,27 +54,86 @@ def parse_iso(dt_str: str) -> datetime:
     return datetime.fromisoformat(dt_str)
 
 
-def load_index(index_path: str):
+@lru_cache(maxsize=200_000)
+def parse_iso_utc(dt_str: str) -> datetime:
+    # last_candle_open_time_utc repeats across consecutive snapshots.
+    return parse_iso(dt_str).astimezone(timezone.utc)
+
+
+def load_index(index_path: str, findings: Findings):
+    """
+    Stream index.csv once into (published_at_utc, history_file) tuples.
+
+    Returns (row_count, parsed). Rows whose published_at_utc does not parse
+    are reported as warnings and left out of `parsed`.
+    """
     if not os.path.isfile(index_path):
         raise FileNotFoundError(f"index.csv not found at {index_path}")
 
-    rows = []
+    row_count = 0
+    parsed = []
     with open(index_path, "r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            rows.append(r)
-    return rows
+        reader = csv.reader(f)
+        header = next(reader, [])
+        pub_i = header.index("published_at_utc") if "published_at_utc" in header else None
+        file_i = header.index("history_file") if "history_file" in header else None
+
+        for row in reader:
+            if not row:
+                continue  # blank line; DictReader skipped these too
+            row_count += 1
+            n = len(row)
+            pub_str = row[pub_i] if pub_i is not None and pub_i < n else None
+            rel = row[file_i] if file_i is not None and file_i < n else None
+            try:
+                pub_utc = parse_iso_utc(pub_str)
+            except Exception:
+                findings.warns.append(f"Bad published_at_utc in index row: {pub_str}")
+                continue
+            parsed.append((pub_utc, rel))
+
+    return row_count, parsed
 
 
 def load_snapshot(history_file: str):
     if not os.path.isfile(history_file):
         return None
-    with open(history_file, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def hour_bucket(dt: datetime) -> datetime:
-    return dt.replace(minute=0, second=0, microsecond=0)
+    with open(history_file, "rb") as f:
+        return loads(f.read())
+
+
+def _as_dict(value):
+    # Snapshot sub-objects may be null (or not objects at all); read as {}.
+    return value if isinstance(value, dict) else {}
+
+
+def load_eth_usdt_integrity(history_file: str):
+    """
+    integrity.eth_usdt of one snapshot as a dict, or None if the file is
+    missing or cannot be read. A null or non-object integrity / eth_usdt
+    reads as {}, so None always means "no snapshot on disk" and a parsed
+    snapshot is never counted as missing. Only this small dict outlives the
+    read, not the whole snapshot.
+    """
+    try:
+        if ijson is not None:
+            if not os.path.isfile(history_file):
+                return None
+            if os.path.getsize(history_file) >= SNAPSHOT_STREAM_MIN_BYTES:
+                with open(history_file, "rb") as f:
+                    items = ijson.items(
+                        f, "integrity.eth_usdt", use_float=True, buf_size=SNAPSHOT_STREAM_BUF_SIZE
+                    )
+                    # No item when integrity is absent, null or not an object.
+                    return _as_dict(next(items, None))
+
+        snap = load_snapshot(history_file)
+    except OSError:
+        # Vanished or unreadable between the listing and the read.
+        return None
+    if snap is None:
+        return None
+    return _as_dict(_as_dict(_as_dict(snap).get("integrity")).get("eth_usdt"))
 
 
 def main():
@@ -58,73 +146,64 @@ def main():
     ap.add_argument("--index", default="data/history/index.csv", help="Path to index.csv")
     args = ap.parse_args()
 
-    findings = Findings(fails=[], warns=[], infos=[])
+    findings = Findings()
 
     # --- Load index
-    rows = load_index(args.index)
-    if not rows:
+    row_count, rows_parsed = load_index(args.index, findings)
+    if not row_count:
         findings.fails.append("index.csv is empty (no history rows).")
         print_report(findings)
         raise SystemExit(2)
 
     # --- Filter to last N days by published_at_utc
-    rows_parsed = []
-    for r in rows:
-        try:
-            pub_utc = parse_iso(r["published_at_utc"]).astimezone(timezone.utc)
-        except Exception:
-            findings.warns.append(f"Bad published_at_utc in index row: {r.get('published_at_utc')}")
-            continue
-        rows_parsed.append((pub_utc, r))
-
-    rows_parsed.sort(key=lambda x: x[0])
+    rows_parsed.sort(key=itemgetter(0))
 
     newest = rows_parsed[-1][0]
     cutoff = newest - timedelta(days=args.days)
-    recent = [(t, r) for (t, r) in rows_parsed if t >= cutoff]
+    # Sorted by time: the window is a suffix, found by binary search.
+    recent = rows_parsed[bisect_left(rows_parsed, cutoff, key=itemgetter(0)):]
 
     if not recent:
         findings.fails.append(f"No rows within last {args.days} days (cutoff {cutoff.isoformat()}).")
         print_report(findings)
         raise SystemExit(2)
 
-    findings.infos.append(f"Checking {len(recent)} snapshots from {recent[0][0].isoformat()} to {recent[-1][0].isoformat()}.")
+    findings.info(f"Checking {len(recent)} snapshots from {recent[0][0].isoformat()} to {recent[-1][0].isoformat()}.")
+
+    times = [t for t, _ in recent]
+    # Epoch seconds, computed once; shared by the duplicate and coverage checks.
+    # Floats keep microseconds distinct, so equality matches the datetimes'.
+    epochs = [t.timestamp() for t in times]
 
     # --- 1) Duplicates (published_at_utc)
-    seen_pub = set()
-    dup_pub = 0
-    for t, _ in recent:
-        if t in seen_pub:
-            dup_pub += 1
-        seen_pub.add(t)
+    dup_pub = len(epochs) - len(set(epochs))
     if dup_pub > 0:
         findings.warns.append(f"Duplicate published_at_utc timestamps found: {dup_pub} duplicates.")
 
     # --- 2) Coverage per day (local date)
-    per_day_hours = defaultdict(set)
-    for t, _ in recent:
-        local = t.astimezone(LOCAL_TZ)
-        per_day_hours[local.date()].add(hour_bucket(local))
+    # Distinct local hour numbers since the epoch; hour // 24 is the local day.
+    local_hours = {(int(e) + LOCAL_OFFSET_S) // 3600 for e in epochs}
+    per_day_hours = Counter(h // 24 for h in local_hours)
 
-    for d, hours in sorted(per_day_hours.items()):
-        count = len(hours)
+    for day, count in sorted(per_day_hours.items()):
+        d = EPOCH_DATE + timedelta(days=day)
         if count < max(1, args.expected_per_day - 6):
             findings.warns.append(f"{d}: only {count}/{args.expected_per_day} hourly snapshots (low coverage).")
         else:
-            findings.infos.append(f"{d}: {count}/{args.expected_per_day} snapshots.")
+            findings.info(f"{d}: {count}/{args.expected_per_day} snapshots.")
 
     # --- 3) Gaps between runs (based on published_at_utc)
-    gaps_warn = 0
+    # One pass, classified like the candle continuity check below.
+    gap_warn_h = args.max_gap_hours_warn
+    gap_fail_h = args.max_gap_hours_fail
     gaps_fail = 0
-    prev_t = None
-    for t, _ in recent:
-        if prev_t is not None:
-            gap_h = (t - prev_t).total_seconds() / 3600.0
-            if gap_h > args.max_gap_hours_fail:
-                gaps_fail += 1
-            elif gap_h > args.max_gap_hours_warn:
-                gaps_warn += 1
-        prev_t = t
+    gaps_warn = 0
+    for a, b in zip(times, islice(times, 1, None)):
+        g = (b - a).total_seconds() / 3600.0
+        if g > gap_fail_h:
+            gaps_fail += 1
+        elif g > gap_warn_h:
+            gaps_warn += 1
 
     if gaps_fail:
         findings.fails.append(f"Large gaps between runs: {gaps_fail} gaps > {args.max_gap_hours_fail}h.")
@@ -140,50 +219,41 @@ def main():
 
     prev_last_candle_utc = None
 
-    for t, r in recent:
-        rel = r.get("history_file")
-        if not rel:
+    snap_paths = [
+        (rel if os.path.isabs(rel) else os.path.join(".", rel)) if rel else None
+        for _, rel in recent
+    ]
+    # Many small files: overlap the reads, consume results in index order.
+    with ThreadPoolExecutor(max_workers=SNAPSHOT_READ_WORKERS) as pool:
+        metas = iter(list(pool.map(load_eth_usdt_integrity, [p for p in snap_paths if p])))
+
+    for (t, _), snap_path in zip(recent, snap_paths):
+        if not snap_path:
             findings.warns.append(f"Missing history_file in index row at {t.isoformat()}.")
             continue
 
-        snap_path = rel if os.path.isabs(rel) else os.path.join(".", rel)
-        snap = load_snapshot(snap_path)
-        if snap is None:
+        # None only for a missing/unreadable file; parsed snapshots give a dict.
+        eth_usdt = next(metas)
+        if eth_usdt is None:
             missing_files += 1
             continue
 
         # Returned count check (ETH-USDT)
-        rc = (
-            snap.get("integrity", {})
-                .get("eth_usdt", {})
-                .get("returned_count")
-        )
-        req = (
-            snap.get("integrity", {})
-                .get("eth_usdt", {})
-                .get("requested_limit")
-        )
+        rc = eth_usdt.get("returned_count")
+        req = eth_usdt.get("requested_limit")
         if isinstance(rc, int) and isinstance(req, int) and rc < req:
             bad_counts += 1
 
         # Freshness check if present
-        freshness = (
-            snap.get("integrity", {})
-                .get("eth_usdt", {})
-                .get("data_freshness_minutes")
-        )
+        freshness = eth_usdt.get("data_freshness_minutes")
         if isinstance(freshness, (int, float)) and freshness > args.max_staleness_min:
             stale_count += 1
 
         # Candle continuity (last candle open utc should usually step by 1h between snapshots)
-        last_candle_utc_str = (
-            snap.get("integrity", {})
-                .get("eth_usdt", {})
-                .get("last_candle_open_time_utc")
-        )
+        last_candle_utc_str = eth_usdt.get("last_candle_open_time_utc")
         if last_candle_utc_str:
             try:
-                last_candle_utc = parse_iso(last_candle_utc_str).astimezone(timezone.utc)
+                last_candle_utc = parse_iso_utc(last_candle_utc_str)
                 if prev_last_candle_utc is not None:
                     step_h = (last_candle_utc - prev_last_candle_utc).total_seconds() / 3600.0
                     if step_h > args.max_gap_hours_fail:
@@ -230,10 +300,10 @@ def print_report(findings: Findings):
 
     if findings.infos:
         print("Info:")
-        for x in findings.infos[:50]:
+        for x in findings.infos:
             print(f"  - {x}")
-        if len(findings.infos) > 50:
-            print(f"  - (and {len(findings.infos) - 50} more info lines)")
+        if findings.infos_overflow:
+            print(f"  - (and {findings.infos_overflow} more info lines)")
 
     if findings.warns:
         print("\nWarnings:")
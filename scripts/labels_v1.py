@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+
+"""
+Labels v1 repair + validation on one in-memory table.
+
+repair_labels_v1.py and validate_labels_v1.py are thin wrappers around
+repair() and validate(). `python scripts/labels_v1.py repair-and-validate`
+runs both on a single read of labels_v1.csv; the report validates exactly
+what repair() left on disk.
+"""
+
+import argparse
+import csv
+import os
+from bisect import bisect_left
+
+LABELS_CSV = os.path.join("data", "labels", "labels_v1.csv")
+
+HORIZONS = [12, 24, 36, 48, 60, 72, 84, 96]
+THRESHOLDS = ["0p5", "1", "2", "3", "5"]
+
+# Column names, built once (aligned with HORIZONS / THRESHOLDS)
+MAX_UP_COLS = tuple(f"max_up_pct_{h}" for h in HORIZONS)
+RANGE_COLS = tuple(f"range_pct_{h}" for h in HORIZONS)
+MDD_COLS = tuple(f"mdd_before_hit_up_{thr}" for thr in THRESHOLDS)
+
+
+def to_float(x):
+    if x is None:
+        return None
+    s = str(x).strip()
+    if s == "":
+        return None
+    try:
+        return float(s)
+    except Exception:
+        return None
+
+
+def to_int(x):
+    if x is None:
+        return None
+    s = str(x).strip()
+    if s == "":
+        return None
+    try:
+        return int(float(s))
+    except Exception:
+        return None
+
+
+def load_rows(path):
+    """
+    (header, rows) with rows as plain lists; blank lines are dropped, as
+    DictReader does.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        return header, [row for row in reader if row]
+
+
+def load_column(header, rows, name, conv):
+    """
+    One column converted with `conv`, aligned with `rows`. Missing columns
+    and short rows give None, like DictReader's r.get(name).
+    """
+    if name not in header:
+        return [None] * len(rows)
+    i = header.index(name)
+    return [conv(r[i]) if i < len(r) else None for r in rows]
+
+
+def monotonic_non_decreasing(values):
+    for i in range(1, len(values)):
+        if values[i] < values[i - 1]:
+            return False
+    return True
+
+
+def repair_rows(header, rows):
+    """
+    Clamp positive mdd_before_hit_up_* values to "0.0" in place; returns the
+    number of cells fixed.
+    """
+    # Resolve the MDD columns once instead of a dict lookup per row and key.
+    mdd_cols = [header.index(col) for col in MDD_COLS if col in header]
+
+    fixes = 0
+    for r in rows:
+        n = len(r)
+        for i in mdd_cols:
+            if i >= n:
+                continue
+            v = r[i]
+            # Non-positive values ("-1.23", "0.0") and blanks never need a fix;
+            # only parse what might be positive.
+            if v == "" or v[0] == "-":
+                continue
+            x = to_float(v)
+            if x is None:
+                continue
+            if x > 0.0:
+                r[i] = "0.0"
+                fixes += 1
+    return fixes
+
+
+def write_rows(path, header, rows):
+    # Short rows are padded in place so the table matches what is on disk.
+    width = len(header)
+    for j, r in enumerate(rows):
+        if len(r) < width:
+            rows[j] = r + [""] * (width - len(r))
+
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def repair(path=LABELS_CSV):
+    """
+    Repair the labels file; returns the (header, rows) table as left on
+    disk, or None if the file does not exist.
+    """
+    if not os.path.isfile(path):
+        print(f"Labels file not found: {path}")
+        return None
+
+    header, rows = load_rows(path)
+
+    if not rows:
+        print("Labels file is empty; nothing to repair.")
+        return header, rows
+
+    fixes = repair_rows(header, rows)
+
+    # Write back (overwrite) only when something changed; a clean file is
+    # already in the form the writer would produce.
+    if fixes:
+        write_rows(path, header, rows)
+
+    print(f"Repaired labels file: {path}")
+    print(f"Positive MDD values clamped to 0.0: {fixes}")
+    return header, rows
+
+
+def validate(path=LABELS_CSV, table=None):
+    """
+    Print the sanity report for the labels file, or for `table` when the
+    caller already holds it in memory.
+    """
+    print("\nLABEL VALIDATION REPORT (v1)")
+    print("============================\n")
+
+    if table is None:
+        if not os.path.isfile(path):
+            print("STATUS: WARN - labels file not found")
+            print("Nothing to validate yet.\n")
+            return
+        table = load_rows(path)
+
+    header, rows = table
+    print(f"Total rows: {len(rows)}\n")
+
+    if not rows:
+        print("STATUS: WARN - labels file is empty\n")
+        return
+
+    # Every numeric column is parsed exactly once, column at a time, and
+    # shared by the checks below (max_up_pct_* feeds three of them).
+    up_cols = [load_column(header, rows, col, to_float) for col in MAX_UP_COLS]
+    range_cols = [load_column(header, rows, col, to_float) for col in RANGE_COLS]
+    t_hit_col = load_column(header, rows, "t_hit_up_0p5", to_int)
+    mdd_cols = {thr: load_column(header, rows, col, to_float) for thr, col in zip(THRESHOLDS, MDD_COLS)}
+    pub_col = load_column(header, rows, "published_at_utc", lambda x: x)
+
+    # -------------------------------------------------
+    # 1) Monotonicity checks
+    # 2) Time-to-hit coherence (0.5%)
+    # -------------------------------------------------
+    # Both checks read the same max_up_pct_* row, so they share one pass.
+    mono_up_viol = []
+    mono_range_viol = []
+    checked = 0
+    tth_checked = 0
+    tth_viol = 0
+
+    for pub, t_hit, up_vals, range_vals in zip(pub_col, t_hit_col, zip(*up_cols), zip(*range_cols)):
+        if None not in up_vals and None not in range_vals:
+            checked += 1
+
+            if not monotonic_non_decreasing(up_vals):
+                mono_up_viol.append(pub)
+
+            if not monotonic_non_decreasing(range_vals):
+                mono_range_viol.append(pub)
+
+        if t_hit is None:
+            continue
+
+        tth_checked += 1
+
+        if t_hit < 1 or t_hit > 96:
+            tth_viol += 1
+            continue
+
+        # bucket check: first horizon >= t_hit (HORIZONS is ascending)
+        bucket = bisect_left(HORIZONS, t_hit)
+
+        if bucket < len(HORIZONS):
+            max_up = up_vals[bucket]
+            if max_up is None or max_up < 0.5:
+                tth_viol += 1
+
+    # -------------------------------------------------
+    # 3) Drawdown sign checks
+    # -------------------------------------------------
+    dd_viol = {thr: 0 for thr in THRESHOLDS}
+    dd_checked = {thr: 0 for thr in THRESHOLDS}
+
+    for thr in THRESHOLDS:
+        col = mdd_cols[thr]
+        dd_checked[thr] = len(col) - col.count(None)
+        dd_viol[thr] = sum(1 for v in col if v is not None and v > 0)
+
+    # -------------------------------------------------
+    # 4) Label maturity
+    # -------------------------------------------------
+    maturity = {h: len(col) - col.count(None) for h, col in zip(HORIZONS, up_cols)}
+
+    # -------------------------------------------------
+    # Report
+    # -------------------------------------------------
+    print("Monotonicity:")
+    print(f"  Rows checked: {checked}")
+    print(f"  max_up_pct : {'PASS' if not mono_up_viol else 'WARN'} ({len(mono_up_viol)} violations)")
+    print(f"  range_pct  : {'PASS' if not mono_range_viol else 'WARN'} ({len(mono_range_viol)} violations)\n")
+
+    print("Time-to-hit coherence (0.5%):")
+    print(f"  Rows checked: {tth_checked}")
+    print(f"  Violations  : {tth_viol}\n")
+
+    print("Drawdown sign (must be <= 0):")
+    for thr in THRESHOLDS:
+        status = "PASS" if dd_viol[thr] == 0 else "WARN"
+        print(f"  {thr.replace('p', '.')}%: {status} ({dd_viol[thr]} violations, checked {dd_checked[thr]})")
+    print()
+
+    print("Label maturity:")
+    for h in HORIZONS:
+        print(f"  {h}h: {maturity[h]}")
+    print()
+
+    if not mono_up_viol and not mono_range_viol and tth_viol == 0 and all(dd_viol[t] == 0 for t in THRESHOLDS):
+        print("STATUS: DATA SANITY OK\n")
+    else:
+        print("STATUS: WARN - review issues above\n")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Repair and/or validate labels v1.")
+    ap.add_argument("command", choices=("repair", "validate", "repair-and-validate"))
+    ap.add_argument("--labels", default=LABELS_CSV, help=f"Path to labels CSV (default {LABELS_CSV})")
+    args = ap.parse_args()
+
+    if args.command == "repair":
+        repair(args.labels)
+    elif args.command == "validate":
+        validate(args.labels)
+    else:
+        table = repair(args.labels)
+        validate(args.labels, table)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,9 @@
 
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from operator import attrgetter
 from zoneinfo import ZoneInfo
 
 LOCAL_TZ = ZoneInfo("Africa/Johannesburg")
@@ -10,6 +12,7 @@ HISTORY_ROOT = os.path.join("data", "history")
 
 # Recommended default retention window
 RETENTION_DAYS = 180
+PRUNE_WORKERS = 8
 
 
 def is_date_folder(name: str) -> bool:
@@ -31,11 +34,16 @@ def main():
 
     removed = 0
     kept = 0
+    stale = []
 
-    for name in sorted(os.listdir(HISTORY_ROOT)):
-        path = os.path.join(HISTORY_ROOT, name)
-        if not os.path.isdir(path):
+    # DirEntry carries the file type from the directory read; no extra stat.
+    with os.scandir(HISTORY_ROOT) as it:
+        entries = sorted(it, key=attrgetter("name"))
+
+    for entry in entries:
+        if not entry.is_dir():
             continue
+        name = entry.name
         if name == "index.csv":
             continue
         if not is_date_folder(name):
@@ -43,12 +51,17 @@ def main():
 
         folder_date = datetime.strptime(name, "%Y-%m-%d").date()
         if folder_date < cutoff_date:
-            shutil.rmtree(path)
-            removed += 1
-            print(f"REMOVED: {path}")
+            stale.append(entry.path)
         else:
             kept += 1
 
+    # rmtree is many small unlinks per folder; run folders concurrently and
+    # report them in name order as each one completes.
+    with ThreadPoolExecutor(max_workers=PRUNE_WORKERS) as pool:
+        for path, _ in zip(stale, pool.map(shutil.rmtree, stale)):
+            removed += 1
+            print(f"REMOVED: {path}")
+
     print(f"Done. Kept {kept} day-folders. Removed {removed} day-folders.")
 
 
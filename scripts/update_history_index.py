@@ -1,9 +1,11 @@
 #!/usr/bin/env python
 
 import csv
-import json
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
+from operator import attrgetter
+
+from _signal_core import loads
 
 HISTORY_ROOT = os.path.join("data", "history")
 INDEX_PATH = os.path.join(HISTORY_ROOT, "index.csv")
@@ -34,16 +36,33 @@ def safe_get(d, path, default=None):
 
 
 def read_existing_rows():
+    """
+    history_file paths already in the index. A row's key is
+    (published_at_utc, history_file), so a file whose path is already
+    indexed can be skipped without opening it.
+    """
     if not os.path.isfile(INDEX_PATH):
         return set()
 
-    seen = set()
+    seen_paths = set()
     with open(INDEX_PATH, "r", encoding="utf-8", newline="") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            key = (row.get("published_at_utc"), row.get("history_file"))
-            seen.add(key)
-    return seen
+            seen_paths.add(row.get("history_file"))
+    return seen_paths
+
+
+def parse_day(name):
+    try:
+        return datetime.strptime(name, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def last_indexed_day(seen_paths):
+    """Newest YYYY-MM-DD day folder referenced by the index, or None."""
+    folders = {os.path.basename(os.path.dirname(p)) for p in seen_paths if p}
+    return max(filter(None, map(parse_day, folders)), default=None)
 
 
 def ensure_index_header():
@@ -55,58 +74,73 @@ def ensure_index_header():
         writer.writerow(HEADER)
 
 
-def iter_history_files():
+def iter_history_files(skip_before=None):
+    """
+    Snapshot paths in day/file order. Day folders dated before `skip_before`
+    are not listed at all; folders without a date name are always walked.
+    """
     if not os.path.isdir(HISTORY_ROOT):
         return
 
-    for day in sorted(os.listdir(HISTORY_ROOT)):
-        day_path = os.path.join(HISTORY_ROOT, day)
-        if not os.path.isdir(day_path):
-            continue
-        for fname in sorted(os.listdir(day_path)):
-            if not fname.endswith(".json"):
+    # scandir: is_dir()/is_file() come from the directory read, no stat per entry.
+    with os.scandir(HISTORY_ROOT) as it:
+        days = sorted((e for e in it if e.is_dir()), key=attrgetter("name"))
+
+    for day in days:
+        if skip_before is not None:
+            day_date = parse_day(day.name)
+            if day_date is not None and day_date < skip_before:
                 continue
-            yield os.path.join(day_path, fname)
+        with os.scandir(day.path) as it:
+            files = sorted(
+                (e for e in it if e.name.endswith(".json") and e.is_file()),
+                key=attrgetter("name"),
+            )
+        for entry in files:
+            yield entry.path
 
 
 def main():
     ensure_index_header()
-    seen = read_existing_rows()
-
-    new_rows = 0
+    seen_paths = read_existing_rows()
 
-    with open(INDEX_PATH, "a", encoding="utf-8", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=HEADER)
+    # Snapshots land in the folder of their publish day, so everything before
+    # the newest indexed day (minus a day of slack) is already indexed.
+    last_day = last_indexed_day(seen_paths)
+    skip_before = last_day - timedelta(days=1) if last_day else None
 
-        for path in iter_history_files():
-            rel_path = os.path.relpath(path, start=".")
-            with open(path, "r", encoding="utf-8") as jf:
-                snap = json.load(jf)
+    # Collect first, append once: one open and one writerows for the batch.
+    new_rows = []
 
-            pub_utc = snap.get("published_at_utc")
-            key = (pub_utc, rel_path)
-            if key in seen:
-                continue
+    for path in iter_history_files(skip_before):
+        rel_path = os.path.relpath(path, start=".")
+        if rel_path in seen_paths:
+            continue
 
-            row = {
-                "published_at_utc": pub_utc,
-                "published_at_local": snap.get("published_at_local"),
-                "date_local": snap.get("date"),
-                "eth_usdt_close": safe_get(snap, ["eth_usdt", "close"]),
-                "eth_usdt_gap_pct": safe_get(snap, ["eth_usdt", "gap_pct"]),
-                "atr_1h": safe_get(snap, ["atr_1h", "value"]),
-                "atr_trend": safe_get(snap, ["atr_1h", "trend"]),
-                "intraday_momentum": snap.get("intraday_momentum"),
-                "early_breakout": safe_get(snap, ["early_breakout", "occurred"]),
-                "last_candle_open_time_local": safe_get(snap, ["integrity", "eth_usdt", "last_candle_open_time_local"]),
-                "last_candle_open_time_utc": safe_get(snap, ["integrity", "eth_usdt", "last_candle_open_time_utc"]),
-                "history_file": rel_path,
-            }
-
-            writer.writerow(row)
-            new_rows += 1
-
-    print(f"Index updated: {INDEX_PATH}. Added {new_rows} new rows.")
+        with open(path, "rb") as jf:
+            snap = loads(jf.read())
+
+        # Same order as HEADER.
+        new_rows.append((
+            snap.get("published_at_utc"),
+            snap.get("published_at_local"),
+            snap.get("date"),
+            safe_get(snap, ["eth_usdt", "close"]),
+            safe_get(snap, ["eth_usdt", "gap_pct"]),
+            safe_get(snap, ["atr_1h", "value"]),
+            safe_get(snap, ["atr_1h", "trend"]),
+            snap.get("intraday_momentum"),
+            safe_get(snap, ["early_breakout", "occurred"]),
+            safe_get(snap, ["integrity", "eth_usdt", "last_candle_open_time_local"]),
+            safe_get(snap, ["integrity", "eth_usdt", "last_candle_open_time_utc"]),
+            rel_path,
+        ))
+
+    if new_rows:
+        with open(INDEX_PATH, "a", encoding="utf-8", newline="") as f:
+            csv.writer(f).writerows(new_rows)
+
+    print(f"Index updated: {INDEX_PATH}. Added {len(new_rows)} new rows.")
 
 
 if __name__ == "__main__":
@@ -34,38 +34,53 @@ def main():
         return
 
     with open(FORECAST_CSV, "r", encoding="utf-8", newline="") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [row for row in reader if row]
 
     print(f"Total rows: {len(rows)}")
     if not rows:
         print("\nSTATUS: WARN - forecast file is empty")
         return
 
-    # Build map: (target, horizon) -> row
-    m: Dict[Tuple[str, int], dict] = {}
+    # Pivot once: (target, horizon) -> parsed (n_total, n_hit, p_hit).
+    # Each cell is converted a single time and shared by every check below.
+    # Columns are resolved to positions up front; a missing column or short
+    # row reads as "", like r.get(col, "") did.
+    cols = [
+        header.index(name) if name in header else None
+        for name in ("target_pct", "horizon_h", "n_total", "n_hit", "p_hit")
+    ]
+
+    grid: Dict[Tuple[str, int], Tuple[Optional[int], Optional[int], Optional[float]]] = {}
     for r in rows:
-        t = r.get("target_pct", "").strip()
-        h = to_int(r.get("horizon_h", "").strip() or "")
+        t_s, h_s, n_total_s, n_hit_s, p_hit_s = (
+            r[i] if i is not None and i < len(r) else "" for i in cols
+        )
+        t = t_s.strip()
+        h = to_int(h_s)
         if not t or h is None:
             continue
-        m[(t, h)] = r
+        grid[(t, h)] = (to_int(n_total_s), to_int(n_hit_s), to_float(p_hit_s))
 
     # Basic checks
     bad_prob = 0
     bad_counts = 0
     missing_pairs = 0
 
+    # p_hit per target in horizon order, for the monotonicity pass.
+    p_by_target: Dict[str, list] = {t: [] for t in THRESHOLDS}
+
     for t in THRESHOLDS:
         for h in HORIZONS:
-            r = m.get((t, h))
-            if r is None:
+            cell = grid.get((t, h))
+            if cell is None:
                 missing_pairs += 1
                 continue
 
-            n_total = to_int(r.get("n_total", "") or "")
-            n_hit = to_int(r.get("n_hit", "") or "")
-            p_hit = to_float(r.get("p_hit", "") or "")
+            n_total, n_hit, p_hit = cell
+            if p_hit is not None:
+                p_by_target[t].append(p_hit)
 
             if n_total is None or n_hit is None or p_hit is None:
                 bad_counts += 1
@@ -93,20 +108,9 @@ def main():
     mono_viol = 0
     mono_checked = 0
 
-    for t in THRESHOLDS:
-        prev_p = None
-        for h in HORIZONS:
-            r = m.get((t, h))
-            if r is None:
-                continue
-            p = to_float(r.get("p_hit", "") or "")
-            if p is None:
-                continue
-            if prev_p is not None:
-                mono_checked += 1
-                if p + 1e-9 < prev_p:
-                    mono_viol += 1
-            prev_p = p
+    for ps in p_by_target.values():
+        mono_checked += max(0, len(ps) - 1)
+        mono_viol += sum(1 for prev_p, p in zip(ps, ps[1:]) if p + 1e-9 < prev_p)
 
     print("\nMonotonicity (p_hit vs horizon):")
     print(f"  Checked: {mono_checked}")